@@ -2,21 +2,23 @@ import streamlit as st
 import os
 import io
 import time
-import base64
-import json
-import csv
-import re
-import requests
-from gtts import gTTS
+import threading
 from dotenv import load_dotenv
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import google.generativeai as genai
-from PIL import Image
+
+load_dotenv()  # before our modules read their settings from the environment
+
+import eligibility
+import extraction
+import jobs
+import media
+import metrics
+import pdf_render
+import storage
+import tts_cache
+import weather
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Gram Sahayak", page_icon="🚜", layout="centered")
-load_dotenv()
 
 # --- API KEYS ---
 api_key = os.getenv("GOOGLE_API_KEY")
@@ -24,13 +26,13 @@ if not api_key:
     st.error("❌ GOOGLE_API_KEY missing in .env file!")
     st.stop()
 
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-flash-latest')
-
-try:
-    import logic
-except ImportError:
-    logic = None
+# Created once per process and shared by every session; the SDK itself is
+# only imported when the first document is scanned
+@st.cache_resource
+def get_model():
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(extraction.MODEL_NAME)
 
 # --- 🗣️ TRANSLATIONS ---
 translations = {
@@ -93,73 +95,113 @@ translations = {
     }
 }
 
+# --- 📦 MEDIA ---
+# PDFs are served as cached static files when static serving is on (see
+# .streamlit/config.toml); otherwise they are inlined as data: URIs. Audio
+# goes through st.audio instead: the static server labels .mp3 as text/plain
+# with nosniff, while Streamlit's media endpoint serves it under a hashed
+# /media URL as audio/mpeg. The player itself is hidden by the CSS below.
+STATIC_MEDIA = bool(st.get_option("server.enableStaticServing"))
+
 # --- 🔊 FUNCTION: AUDIO (ROBUST) ---
+# Returns the clip length in seconds (0 if nothing could be played)
 def speak_text(text, lang='mr'):
     try:
-        tts = gTTS(text=text, lang=lang) 
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-        audio_b64 = base64.b64encode(audio_buffer.read()).decode()
-        
-        # We use a tiny visible player so you can see if it loaded
-        # But we set width=1 to make it almost invisible but "active"
-        audio_html = f"""
-            <audio autoplay="true" style="width:1px; height:1px;">
-            <source src="data:audio/mp3;base64,{audio_b64}" type="audio/mp3">
-            </audio>
-        """
-        st.markdown(audio_html, unsafe_allow_html=True)
+        with metrics.timed("tts", lang) as m:
+            audio_bytes = tts_cache.get_audio(text, lang)
+            m.size(len(audio_bytes))
+        if media.FORCE_INLINE:
+            # We use a tiny visible player so you can see if it loaded
+            # But we set width=1 to make it almost invisible but "active"
+            audio_html = f"""
+                <audio autoplay="true" style="width:1px; height:1px;">
+                <source src="{media.data_uri(audio_bytes, "audio/mp3")}" type="audio/mp3">
+                </audio>
+            """
+            st.markdown(audio_html, unsafe_allow_html=True)
+        else:
+            st.audio(audio_bytes, format="audio/mpeg", autoplay=True)
+        return tts_cache.mp3_duration(audio_bytes)
     except Exception as e:
         # Show error if internet is down
         st.error(f"Audio Error (Check Internet): {e}")
+        return 0.0
+
+# Render all fixed prompts once per process, in the background
+@st.cache_resource
+def start_tts_prewarm():
+    if os.getenv("TTS_PREWARM", "1") == "0": return None
+    worker = threading.Thread(target=tts_cache.prewarm, args=(translations,), daemon=True)
+    worker.start()
+    return worker
+
+start_tts_prewarm()
 
 # --- 📊 FUNCTION: DB ---
+# Import the old CSV file once per process; later runs are no-ops
+@st.cache_resource
+def init_storage():
+    storage.init_db()
+    return storage.migrate_csv()
+
+init_storage()
+
 def save_to_csv(name, area, amount, scheme):
-    file_name = "gram_sahayak_db.csv"
-    if not os.path.exists(file_name):
-        with open(file_name, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Timestamp", "Farmer Name", "Land Area", "Scheme", "Loan Amount"])
     try:
-        with open(file_name, mode='a', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-            writer.writerow([timestamp, name, area, scheme, amount])
-        return True
+        with metrics.timed("save", voice_lang):
+            return storage.save_application(name, area, amount, scheme)
     except Exception as e:
         st.error(f"Save Error: {e}")
         return False
 
 # --- 🌦️ WEATHER ---
+WEATHER_CITIES = [c.strip() for c in os.getenv("WEATHER_CITIES", "Solapur").split(",") if c.strip()]
+
 def get_weather(city="Solapur"):
-    api_key = os.getenv("OPENWEATHER_API_KEY") 
-    if not api_key: return None, None, None
-    try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        data = requests.get(url).json()
-        if data.get("cod") == 200:
-            return data['main']['temp'], data['weather'][0]['description'], data['weather'][0]['icon']
-    except:
-        pass
-    return None, None, None
+    # Served from the shared cache; never waits on the network
+    return weather.get_weather(city)
 
 # --- 📄 PDF ---
 def generate_pdf(name, area, amount, scheme_name):
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    c.setTitle(f"{scheme_name} Application")
-    c.setFont("Helvetica-Bold", 20)
-    c.drawString(50, 750, f"APPLICATION: {scheme_name}")
-    c.line(50, 735, 550, 735)
-    c.setFont("Helvetica", 12)
-    c.drawString(50, 700, f"Date: {time.strftime('%d-%m-%Y')}")
-    c.drawString(50, 660, f"Name: {name}")
-    c.drawString(50, 640, f"Land Area: {area}")
-    c.drawString(50, 600, f"Loan Amount: {amount}")
-    c.save()
-    buffer.seek(0)
-    return buffer
+    # Memoized: reruns and selectbox changes reuse the rendered bytes
+    with metrics.timed("pdf", voice_lang) as m:
+        pdf = pdf_render.render_application(name, area, amount, scheme_name)
+        m.size(len(pdf))
+    return io.BytesIO(pdf)
+
+# --- ⏳ JOB POLLING ---
+# Re-checks a background job every second without blocking the session,
+# then reruns the whole page once it has finished
+@st.fragment(run_every=1)
+def poll_job(job_id):
+    if not jobs.is_pending(job_id):
+        st.rerun()
+
+# --- ⏭️ STEP TRANSITIONS ---
+# Records how long the farmer spent on a step (e.g. "step_1_to_2")
+def go_to_step(step):
+    now = time.time()
+    started = st.session_state.get("step_started_at", now)
+    metrics.observe(f"step_{st.session_state.step}_to_{step}", (now - started) * 1000, voice_lang)
+    st.session_state.step = step
+    st.session_state.step_started_at = now
+
+# Instead of sleeping until the voice prompt finishes, end this run and let a
+# timer fragment trigger the rerun once the clip (measured from its MP3
+# frames) has played. No server thread waits in the meantime.
+AUDIO_TAIL_SECONDS = 0.5  # browser decode/start-up slack
+
+def rerun_after_audio(duration, message=None):
+    st.session_state.rerun_at = time.time() + duration + AUDIO_TAIL_SECONDS
+    if message: st.info(message)
+    wait_for_rerun()
+    st.stop()
+
+@st.fragment(run_every=0.5)
+def wait_for_rerun():
+    if time.time() >= st.session_state.get("rerun_at", 0):
+        st.session_state.pop("rerun_at", None)
+        st.rerun()
 
 # --- CSS ---
 st.markdown("""
@@ -170,6 +212,7 @@ st.markdown("""
     .stChatMessage { background-color: white; border-radius: 12px; border: 1px solid #e0e0e0; padding: 15px; }
     .stChatMessage[data-testid="stChatMessageUser"] { background-color: #DCEDC8; border-left: 6px solid #558B2F; }
     .stButton>button { background: linear-gradient(90deg, #2E7D32 0%, #43A047 100%); color: white !important; font-weight: bold; border: none; }
+    .stElementContainer:has([data-testid="stAudio"]) { display: none; }
 </style>
 """, unsafe_allow_html=True)
 
@@ -185,15 +228,16 @@ with st.sidebar:
         st.rerun()
 
     t = translations[lang_choice]
-    voice_lang = 'mr' if lang_choice == "Marathi" else ('hi' if lang_choice == "Hindi" else 'en')
+    voice_lang = tts_cache.VOICE_LANGS[lang_choice]
 
     st.divider()
     st.header("📍 Weather")
-    temp, desc, icon = get_weather("Solapur")
-    if temp:
-        col1, col2 = st.columns([1, 2])
-        with col1: st.image(f"http://openweathermap.org/img/wn/{icon}@2x.png", width=50)
-        with col2: st.metric("Solapur", f"{temp}°C", desc.title())
+    for city in WEATHER_CITIES:
+        temp, desc, icon = get_weather(city)
+        if temp is not None:
+            col1, col2 = st.columns([1, 2])
+            with col1: st.image(f"http://openweathermap.org/img/wn/{icon}@2x.png", width=50)
+            with col2: st.metric(city, f"{temp}°C", desc.title())
 
 # --- STATE ---
 if "step" not in st.session_state: st.session_state.step = 0 # Start at 0 for Welcome Screen
@@ -202,6 +246,8 @@ if "review_mode" not in st.session_state: st.session_state.review_mode = False
 if "schemes_shown" not in st.session_state: st.session_state.schemes_shown = False
 if "preview_shown" not in st.session_state: st.session_state.preview_shown = False
 if "pdf_ready" not in st.session_state: st.session_state.pdf_ready = False
+if "step_started_at" not in st.session_state: st.session_state.step_started_at = time.time()
+st.session_state.pop("rerun_at", None) # any pending transition is superseded by this run
 
 # --- MAIN UI ---
 col1, col2 = st.columns([1, 5])
@@ -221,9 +267,9 @@ if st.session_state.step == 0:
     st.info("👋 Click Start to begin.")
     if st.button("🚀 Start App / अ‍ॅप सुरू करा", use_container_width=True):
         st.session_state.chat_history.append({"role": "assistant", "content": t['greeting']})
-        speak_text(t['greeting'], lang=voice_lang)
-        st.session_state.step = 1
-        st.rerun()
+        duration = speak_text(t['greeting'], lang=voice_lang)
+        go_to_step(1)
+        rerun_after_audio(duration)
 
 # --- STEP 1: VOICE ---
 elif st.session_state.step == 1:
@@ -242,14 +288,11 @@ elif st.session_state.step == 1:
             
             msg = t['step1_confirm'].format(amount=st.session_state.loan_amount)
             st.session_state.chat_history.append({"role": "assistant", "content": msg})
-            speak_text(msg, lang=voice_lang)
-            
-            # ⏳ INCREASED DELAY TO 5 SECONDS so audio finishes
-            with st.spinner("Listening..."):
-                time.sleep(5)
+            duration = speak_text(msg, lang=voice_lang)
             
-            st.session_state.step = 2
-            st.rerun()
+            # ⏳ Move on once the confirmation has been played
+            go_to_step(2)
+            rerun_after_audio(duration, "Listening...")
 
 # --- STEP 2: SCAN & VERIFY ---
 elif st.session_state.step == 2:
@@ -268,31 +311,31 @@ elif st.session_state.step == 2:
             
             st.info(t['step2_click_hint'])
             
-            if st.button(t['step2_btn'], use_container_width=True):
-                with st.spinner("AI Processing..."):
-                    speak_text(t['step2_analyzing'], lang=voice_lang)
-                    img = Image.open(uploaded_file)
-                    
-                    prompt = """
-                    Extract from this 7/12 document:
-                    1. Name (Bhogvatdarache Nav)
-                    2. Area (Hectare)
-                    Return JSON: {"name": "...", "area": "..."}
-                    """
-                    try:
-                        response = model.generate_content([prompt, img])
-                        match = re.search(r'\{.*\}', response.text, re.DOTALL)
-                        
-                        if match:
-                            data = json.loads(match.group(0))
-                            st.session_state.farmer_name = data.get("name", "Farmer")
-                            st.session_state.land_area = data.get("area", "1.00")
-                            st.session_state.review_mode = True 
-                            st.rerun()
-                        else:
-                            st.error("Could not read image.")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+            force_reread = st.checkbox("🔁 Force re-read", value=False)
+            if st.button(t['step2_btn'], use_container_width=True, disabled="extract_job" in st.session_state):
+                speak_text(t['step2_analyzing'], lang=voice_lang)
+                st.session_state.extract_job = jobs.submit_extraction(get_model(), uploaded_file.getvalue(), force=force_reread, lang=voice_lang)
+
+        # ⏳ Extraction runs on the shared worker pool; we only poll it here
+        if "extract_job" in st.session_state:
+            job_id = st.session_state.extract_job
+            job = jobs.status(job_id)
+            if job["state"] in ("queued", "running"):
+                st.info("⏳ AI Processing..." if job["state"] == "running" else "⏳ Waiting for a free slot...")
+                poll_job(job_id)
+            else:
+                del st.session_state.extract_job
+                jobs.forget(job_id)
+                if job["state"] == "done":
+                    data, _ = job["result"]
+                    st.session_state.farmer_name = data["name"]
+                    st.session_state.land_area = data["area"]
+                    st.session_state.review_mode = True 
+                    st.rerun()
+                elif isinstance(job.get("error"), extraction.ExtractionError):
+                    st.error(str(job["error"]))
+                else:
+                    st.error(f"Error: {job.get('error', 'Job lost, please retry.')}")
     else:
         verify_msg = t['step2_verify'].format(name=st.session_state.farmer_name, area=st.session_state.land_area)
         if "verified_spoken" not in st.session_state:
@@ -306,7 +349,7 @@ elif st.session_state.step == 2:
         col1, col2 = st.columns(2)
         with col1:
             if st.button(t['btn_yes'], use_container_width=True):
-                st.session_state.step = 3
+                go_to_step(3)
                 st.rerun()
         with col2:
             if st.button(t['btn_no'], use_container_width=True):
@@ -316,18 +359,19 @@ elif st.session_state.step == 2:
 
 # --- STEP 3: PREVIEW & SUBMIT ---
 elif st.session_state.step == 3:
-    if logic:
+    if eligibility.available():
         profile = {"name": st.session_state.farmer_name, "occupation": "Farmer", "land_holding": st.session_state.land_area}
-        schemes = logic.check_eligibility(profile)
+        with metrics.timed("eligibility", voice_lang):
+            schemes = eligibility.check_eligibility(profile)
         
         if schemes:
             if not st.session_state.schemes_shown:
                 msg = t['step3_eligible'].format(area=st.session_state.land_area)
                 scheme_list = "\n".join([f"- {s['name']}" for s in schemes])
                 st.session_state.chat_history.append({"role": "assistant", "content": f"🎉 **{msg}**\n\n{scheme_list}"})
-                speak_text(msg, lang=voice_lang)
+                duration = speak_text(msg, lang=voice_lang)
                 st.session_state.schemes_shown = True
-                st.rerun()
+                rerun_after_audio(duration)
             
             selected = st.selectbox("Select Scheme:", [s['name'] for s in schemes])
             pdf_buffer = generate_pdf(st.session_state.farmer_name, st.session_state.land_area, st.session_state.loan_amount, selected)
@@ -339,8 +383,8 @@ elif st.session_state.step == 3:
                 st.session_state.preview_shown = True
             
             st.markdown("### 📝 Application Review")
-            base64_pdf = base64.b64encode(pdf_buffer.getvalue()).decode('utf-8')
-            pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="500" type="application/pdf"></iframe>'
+            pdf_src = media.media_url(pdf_buffer.getvalue(), "pdf", "application/pdf", static_enabled=STATIC_MEDIA)
+            pdf_display = f'<iframe src="{pdf_src}" width="100%" height="500" type="application/pdf"></iframe>'
             st.markdown(pdf_display, unsafe_allow_html=True)
             st.markdown("---")
 
@@ -349,9 +393,9 @@ elif st.session_state.step == 3:
                 if st.button(t['step3_btn_submit'], use_container_width=True):
                     save_to_csv(st.session_state.farmer_name, st.session_state.land_area, st.session_state.loan_amount, selected)
                     st.toast("Saved!", icon="💾")
-                    speak_text(t['success'], lang=voice_lang)
+                    duration = speak_text(t['success'], lang=voice_lang)
                     st.session_state.pdf_ready = True
-                    st.rerun()
+                    rerun_after_audio(duration)
             
             with col2:
                 if st.session_state.pdf_ready:
@@ -0,0 +1,136 @@
+# --- ⏱️ STARTUP BENCHMARK ---
+# Measures cold-start cost in fresh interpreters:
+#   * import time of streamlit and each of our modules
+#   * time until app.py has rendered the welcome screen (step 0)
+#   * which heavy SDKs were loaded by then (should be none)
+#
+#   python bench_startup.py -o startup.json
+#   python bench_startup.py --baseline startup.json   # exits 1 on regression
+#
+# Runs happen in a throwaway working directory with every store pointed at it,
+# so the real database and caches are neither touched nor timed.
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODULES = ["streamlit", "eligibility", "extraction", "jobs", "media", "metrics", "pdf_render", "storage", "tts_cache", "weather"]
+HEAVY = ["google.generativeai", "gtts", "reportlab", "PIL", "pandas", "numpy", "requests", "tenacity"]
+
+IMPORT_SNIPPET = """
+import sys, time, json
+t = time.perf_counter()
+import {module}
+print(json.dumps((time.perf_counter() - t) * 1000))
+"""
+
+RENDER_SNIPPET = """
+import sys, time, json
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+elapsed = (time.perf_counter() - t) * 1000
+heavy = [m for m in {heavy!r} if m in sys.modules]
+errors = [e.value for e in at.exception]
+print(json.dumps({{"ms": elapsed, "heavy_loaded": heavy, "errors": errors}}))
+"""
+
+
+def _run(code, env, cwd):
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, timeout=300)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip()[-2000:])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(repeats=5):
+    workdir = tempfile.mkdtemp(prefix="gram_sahayak_bench_")
+    try:
+        return _measure(repeats, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _measure(repeats, workdir):
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "benchmark-dummy-key")
+    env["TTS_PREWARM"] = "0"  # background warm-up would race the measurement
+    env.pop("OPENWEATHER_API_KEY", None)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [HERE, env.get("PYTHONPATH")])),
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts"),
+        "GRAM_SAHAYAK_DB": os.path.join(workdir, "gram_sahayak.db"),
+        "EXTRACTION_CACHE_DB": os.path.join(workdir, "extraction_cache.db"),
+        "PREPROCESS_STATS_FILE": os.path.join(workdir, "extraction_stats.jsonl"),
+        "METRICS_FILE": os.path.join(workdir, "metrics.jsonl"),
+    })
+    # Streamlit reads .streamlit/config.toml from the working directory
+    config_dir = os.path.join(HERE, ".streamlit")
+    if os.path.isdir(config_dir):
+        shutil.copytree(config_dir, os.path.join(workdir, ".streamlit"))
+
+    imports = {}
+    for module in MODULES:
+        samples = [_run(IMPORT_SNIPPET.format(module=module), env, workdir) for _ in range(repeats)]
+        imports[module] = round(statistics.median(samples), 1)
+
+    app = os.path.join(HERE, "app.py")
+    renders = [_run(RENDER_SNIPPET.format(heavy=HEAVY, app=app), env, workdir) for _ in range(repeats)]
+    return {
+        "python": sys.version.split()[0],
+        "repeats": repeats,
+        "import_ms": imports,
+        "first_render_ms": round(statistics.median(r["ms"] for r in renders), 1),
+        "heavy_loaded_at_first_render": renders[-1]["heavy_loaded"],
+        "errors": renders[-1]["errors"],
+    }
+
+
+def compare(result, baseline, tolerance):
+    # Returns a list of human-readable regressions
+    problems = []
+    pairs = [("first_render_ms", result["first_render_ms"], baseline.get("first_render_ms"))]
+    pairs += [(f"import_ms.{m}", v, baseline.get("import_ms", {}).get(m)) for m, v in result["import_ms"].items()]
+    for name, now, before in pairs:
+        # small absolute slack so sub-10ms imports don't flap
+        if before and now > before * (1 + tolerance) + 5:
+            problems.append(f"{name}: {before} ms -> {now} ms")
+    new_heavy = set(result["heavy_loaded_at_first_render"]) - set(baseline.get("heavy_loaded_at_first_render", []))
+    if new_heavy:
+        problems.append(f"now loaded before first render: {', '.join(sorted(new_heavy))}")
+    if result["errors"]:
+        problems.append(f"app raised during first render: {result['errors']}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Gram Sahayak cold start.")
+    parser.add_argument("-n", "--repeats", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, e.g. 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    result = measure(args.repeats)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for p in problems:
+            print(f"❌ {p}")
+        if problems:
+            sys.exit(1)
+        print("✅ No startup regressions")
+
+
+if __name__ == "__main__":
+    main()
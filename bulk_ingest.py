@@ -0,0 +1,183 @@
+# --- 📦 BULK 7/12 INGESTION ---
+# Headless batch entry point for field offices:
+#
+#   python bulk_ingest.py scans/ --workers 4 --model-concurrency 4
+#
+# Images are decoded and preprocessed in a process pool, Gemini calls go
+# through a small thread pool (same prompt, parsing, result cache and retry
+# policy as the app), and every record is screened with
+# eligibility.check_eligibility and upserted into the store's ingest_results
+# table, keyed by scan hash, so a file processed twice is still one row.
+# Progress is appended to a checkpoint file, so rerunning the same command
+# resumes where a crashed run stopped; failures are listed per file in an
+# error report.
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from dotenv import load_dotenv
+load_dotenv()  # before our modules read their settings from the environment
+
+import eligibility
+import extraction
+import jobs
+import preprocess
+import storage
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+# --- CHECKPOINT ---
+def load_checkpoint(path):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from a crash
+            if rec.get("status") == "done":
+                done.add(rec["file"])
+    return done
+
+
+def list_images(folder):
+    for root, dirs, names in os.walk(folder):
+        dirs.sort()
+        for name in sorted(names):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), folder)
+
+
+# --- STAGE 1: decode + preprocess (process pool) ---
+def prepare_file(folder, rel_path):
+    with open(os.path.join(folder, rel_path), "rb") as f:
+        raw = f.read()
+    key = extraction.cache_key(raw)
+    cached = extraction.cache_get(key)
+    if cached is not None:
+        return rel_path, key, None, None, cached
+    blob, stats = preprocess.prepare_image(raw)
+    return rel_path, key, blob, stats, None
+
+
+# --- STAGE 2: model call + eligibility + store (thread pool) ---
+def read_and_store(model, rel_path, key, blob, stats, data):
+    stage = "extract"
+    try:
+        if data is None:
+            generate = lambda contents: jobs.generate_with_retry(model, contents)
+            data = extraction.extract_prepared(model, key, blob, dict(stats, file=rel_path), generate)
+
+        stage = "eligibility"
+        schemes = []
+        if eligibility.available():
+            profile = {"name": data["name"], "occupation": "Farmer", "land_holding": data["area"]}
+            schemes = [s["name"] for s in eligibility.check_eligibility(profile)]
+
+        stage = "store"
+        storage.save_ingest_result(key, rel_path, data["name"], data["area"], "; ".join(schemes))
+        return {"file": rel_path, "status": "done", "name": data["name"], "area": data["area"], "schemes": schemes}
+    except Exception as e:
+        return {"file": rel_path, "status": "error", "stage": stage, "error": f"{type(e).__name__}: {e}"}
+
+
+# --- PIPELINE ---
+def run(folder, model, workers=4, model_concurrency=4, checkpoint=None, error_report=None):
+    checkpoint = checkpoint or os.path.join(folder, ".ingest_checkpoint.jsonl")
+    error_report = error_report or "ingest_errors.csv"
+    done = load_checkpoint(checkpoint)
+    pending = (p for p in list_images(folder) if p not in done)
+    counts = {"done": 0, "error": 0, "skipped": len(done)}
+    max_prepared = workers * 2
+    max_reading = model_concurrency * 2
+
+    storage.init_db()
+    new_report = not os.path.exists(error_report)
+    with open(checkpoint, "a", encoding="utf-8") as ckpt, open(error_report, "a", newline="", encoding="utf-8") as err_file, \
+            ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as prep_pool, \
+            ThreadPoolExecutor(model_concurrency, thread_name_prefix="ingest") as read_pool:
+        errors = csv.writer(err_file)
+        if new_report:
+            errors.writerow(["file", "stage", "error", "timestamp"])
+
+        def record(result):
+            ckpt.write(json.dumps(result, ensure_ascii=False) + "\n")
+            ckpt.flush()
+            counts[result["status"]] += 1
+            if result["status"] == "error":
+                errors.writerow([result["file"], result["stage"], result["error"], time.strftime('%Y-%m-%d %H:%M:%S')])
+                err_file.flush()
+
+        preparing, reading = {}, set()
+        exhausted = False
+        last_report = 0
+        while True:
+            # Keep both stages fed without reading the whole folder into memory
+            while not exhausted and len(preparing) < max_prepared and len(reading) < max_reading:
+                rel_path = next(pending, None)
+                if rel_path is None:
+                    exhausted = True
+                    break
+                preparing[prep_pool.submit(prepare_file, folder, rel_path)] = rel_path
+            if not preparing and not reading:
+                break
+
+            finished, _ = wait(list(preparing) + list(reading), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                if fut in preparing:
+                    rel_path = preparing.pop(fut)
+                    try:
+                        prepared = fut.result()
+                    except Exception as e:
+                        record({"file": rel_path, "status": "error", "stage": "preprocess", "error": f"{type(e).__name__}: {e}"})
+                        continue
+                    reading.add(read_pool.submit(read_and_store, model, *prepared))
+                else:
+                    reading.discard(fut)
+                    record(fut.result())
+
+            total = counts["done"] + counts["error"]
+            if total - last_report >= 50:
+                last_report = total
+                print(f"... {counts['done']} stored, {counts['error']} failed", file=sys.stderr)
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest a folder of 7/12 scans.")
+    parser.add_argument("folder")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="processes for image decoding/preprocessing")
+    parser.add_argument("--model-concurrency", type=int, default=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")))
+    parser.add_argument("--checkpoint", help="progress file (default: <folder>/.ingest_checkpoint.jsonl)")
+    parser.add_argument("--errors", default="ingest_errors.csv", help="per-file error report")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        sys.exit("❌ GOOGLE_API_KEY missing in .env file!")
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(extraction.MODEL_NAME)
+
+    if not eligibility.available():
+        print("⚠️ No scheme rules found - schemes will not be screened", file=sys.stderr)
+
+    start = time.perf_counter()
+    counts = run(args.folder, model, args.workers, args.model_concurrency, args.checkpoint, args.errors)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {counts['done']} stored, {counts['error']} failed, {counts['skipped']} already done ({elapsed:.1f}s)")
+    if counts["error"]:
+        print(f"See {args.errors} for the failures.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# --- 🧮 ELIGIBILITY ENGINE ---
+# Compiled, indexed scheme rules behind check_eligibility(profile).
+#
+# Rules are read once from SCHEMES_FILE (default schemes.json), a list of
+#   {"name": "...", "occupations": ["Farmer"], "min_land": 0, "max_land": 2}
+# where missing bounds are open and an empty/missing occupation list means
+# "any occupation"; extra keys are passed through to the caller. Schemes are
+# indexed by min_land so a lookup is a bisect plus a short scan, and
+# check_eligibility_batch() screens a whole DataFrame / Arrow table at once
+# with NumPy. Without a rules file we fall back to the `logic` module (if
+# installed), memoized and de-duplicated in batch mode.
+import os
+import re
+import json
+import bisect
+import threading
+from functools import lru_cache
+
+try:
+    import logic
+except ImportError:
+    logic = None
+
+SCHEMES_FILE = os.getenv("SCHEMES_FILE", "schemes.json")
+ANY = "*"
+
+_DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def parse_land(value):
+    # "1.20 Hectare", "१.२० हेक्टर", 1.2 -> 1.2 ; unreadable -> None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value or "").translate(_DEVANAGARI_DIGITS))
+    return float(match.group(0)) if match else None
+
+
+def _compile(schemes):
+    by_min = sorted(range(len(schemes)), key=lambda i: schemes[i].get("min_land") or 0)
+    occupations = {}
+    for i, s in enumerate(schemes):
+        for occ in s.get("occupations") or [ANY]:
+            occupations.setdefault(occ.lower() if occ != ANY else ANY, []).append(i)
+    return {
+        "schemes": schemes,
+        "by_min": by_min,
+        "sorted_mins": [schemes[i].get("min_land") or 0 for i in by_min],
+        "max_list": [float("inf") if s.get("max_land") is None else s["max_land"] for s in schemes],
+        "names": [s["name"] for s in schemes],
+        "min_list": [s.get("min_land") or 0 for s in schemes],
+        "by_occupation": {k: frozenset(v) for k, v in occupations.items()},
+    }
+
+
+def load_engine(path=None):
+    path = path or SCHEMES_FILE
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return _compile(json.load(f))
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = load_engine() or {}
+    return _engine or None
+
+
+def reload():
+    # Call after the scheme rules change
+    global _engine
+    with _engine_lock:
+        _engine = None
+    _lookup.cache_clear()
+    _logic_lookup.cache_clear()
+
+
+def available():
+    return _get_engine() is not None or logic is not None
+
+
+def _allowed(engine, occupation):
+    idx = engine["by_occupation"]
+    return idx.get(ANY, frozenset()) | idx.get((occupation or "").lower(), frozenset())
+
+
+# --- SINGLE LOOKUP ---
+@lru_cache(maxsize=4096)
+def _lookup(occupation, land):
+    engine = _get_engine()
+    if land is None:
+        return ()
+    allowed = _allowed(engine, occupation)
+    end = bisect.bisect_right(engine["sorted_mins"], land)  # schemes with min_land <= land
+    hits = sorted(i for i in engine["by_min"][:end] if land <= engine["max_list"][i] and i in allowed)
+    return tuple(engine["schemes"][i] for i in hits)
+
+
+@lru_cache(maxsize=4096)
+def _logic_lookup(frozen_profile):
+    return tuple(logic.check_eligibility(dict(frozen_profile)) or ())
+
+
+def check_eligibility(profile):
+    if _get_engine() is not None:
+        return list(_lookup(profile.get("occupation"), parse_land(profile.get("land_holding"))))
+    if logic is not None:
+        return list(_logic_lookup(tuple(sorted(profile.items()))))
+    return []
+
+
+# --- BATCH ---
+def check_eligibility_batch(profiles):
+    # profiles: pandas DataFrame or pyarrow Table with `occupation` and
+    # `land_holding` columns. Returns a DataFrame with one boolean column per
+    # scheme plus `eligible_schemes` (list of names) for each row.
+    import numpy as np
+    import pandas as pd
+
+    df = profiles.to_pandas() if hasattr(profiles, "to_pandas") else pd.DataFrame(profiles)
+    engine = _get_engine()
+
+    if engine is None:
+        if logic is None:
+            return df.assign(eligible_schemes=[[] for _ in range(len(df))])
+        # Only call the slow path once per distinct profile
+        keys = df[["occupation", "land_holding"]].astype(str).agg("\0".join, axis=1)
+        first = ~keys.duplicated()
+        answers = {
+            k: [s["name"] for s in check_eligibility(rec)]
+            for k, rec in zip(keys[first], df[first].to_dict("records"))
+        }
+        return df.assign(eligible_schemes=keys.map(answers))
+
+    land = (
+        df["land_holding"].astype(str).str.translate(_DEVANAGARI_DIGITS)
+        .str.extract(r"(\d+(?:\.\d+)?)", expand=False).astype(float).to_numpy()
+    )
+
+    names_arr = np.array(engine["names"], dtype=object)
+    mins = np.array(engine["min_list"], dtype=float)
+    maxs = np.array(engine["max_list"], dtype=float)
+    occ = pd.Categorical(df["occupation"].fillna("").astype(str).str.lower())
+    n_schemes = len(engine["names"])
+    occ_allowed = np.zeros((len(occ.categories), n_schemes), dtype=bool)
+    for code, name in enumerate(occ.categories):
+        occ_allowed[code, list(_allowed(engine, name))] = True
+
+    with np.errstate(invalid="ignore"):  # NaN land compares False everywhere
+        mask = (land[:, None] >= mins) & (land[:, None] <= maxs)
+    mask &= occ_allowed[occ.codes]
+
+    result = pd.DataFrame(mask, columns=names_arr, index=df.index)
+    rows, cols = np.nonzero(mask)
+    names = [[] for _ in range(len(df))]
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        names[r].append(names_arr[c])
+    return pd.concat([df, result], axis=1).assign(eligible_schemes=names)
@@ -0,0 +1,186 @@
+# --- 🔍 7/12 EXTRACTION ---
+# Prompt, response parsing and a persistent result cache for Gemini reads of
+# 7/12 extracts. Results are keyed by a hash of the uploaded bytes and the
+# prompt/model version, so re-uploading the same scan skips the model entirely.
+# Hit/miss counters are for operators: `python extraction.py` prints them.
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import preprocess
+
+MODEL_NAME = "gemini-flash-latest"
+EXTRACTION_PROMPT = """
+Extract from this 7/12 document:
+1. Name (Bhogvatdarache Nav)
+2. Area (Hectare)
+Return JSON: {"name": "...", "area": "..."}
+"""
+# Editing the prompt or switching models changes this, so old cached reads
+# are never served for the new setup
+PROMPT_VERSION = hashlib.sha256(f"{MODEL_NAME}\0{EXTRACTION_PROMPT}".encode("utf-8")).hexdigest()[:12]
+
+CACHE_FILE = os.getenv("EXTRACTION_CACHE_DB", "extraction_cache.db")
+CACHE_TTL_SECONDS = int(os.getenv("EXTRACTION_CACHE_TTL_DAYS", "30")) * 86400
+CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+STATS_TTL_SECONDS = 30
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    name TEXT,
+    area TEXT,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    latency_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+_stats = (0.0, None)  # (read_at, stats) shared by every thread in the process
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def parse_response(text):
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not match:
+        raise ExtractionError("Could not read image.")
+    data = json.loads(match.group(0))
+    return {"name": data.get("name", "Farmer"), "area": data.get("area", "1.00")}
+
+
+# --- CACHE ---
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_FILE, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(CACHE_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def cache_key(raw_bytes):
+    h = hashlib.sha256(PROMPT_VERSION.encode())
+    h.update(b"\0")
+    h.update(raw_bytes)
+    return h.hexdigest()
+
+
+def _bump(conn, **amounts):
+    conn.executemany(
+        "INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        list(amounts.items()),
+    )
+
+
+def cache_get(key):
+    conn = _conn()
+    now = time.time()
+    with conn:
+        row = conn.execute(
+            "SELECT name, area, latency_ms FROM results WHERE key = ? AND created_at > ?", (key, now - CACHE_TTL_SECONDS)
+        ).fetchone()
+        if row is None:
+            _bump(conn, misses=1)
+            return None
+        conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+        _bump(conn, hits=1, saved_ms=row[2])
+    return {"name": row[0], "area": row[1]}
+
+
+def cache_put(key, data, latency_ms):
+    conn = _conn()
+    now = time.time()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, name, area, created_at, last_used, latency_ms) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, data["name"], data["area"], now, now, latency_ms),
+        )
+        conn.execute("DELETE FROM results WHERE created_at <= ?", (now - CACHE_TTL_SECONDS,))
+        conn.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (CACHE_MAX_ENTRIES,),
+        )
+
+
+def _read_counters():
+    # Short-lived, read-only connection: operator views should not leave one
+    # open per thread or create the cache file
+    if not os.path.exists(CACHE_FILE):
+        return {}
+    conn = sqlite3.connect(f"file:{CACHE_FILE}?mode=ro", uri=True, timeout=10)
+    try:
+        return dict(conn.execute("SELECT name, value FROM counters").fetchall())
+    except sqlite3.OperationalError:
+        return {}  # no counters table yet
+    finally:
+        conn.close()
+
+
+def cache_stats(max_age=STATS_TTL_SECONDS):
+    global _stats
+    read_at, stats = _stats
+    if stats is not None and time.monotonic() - read_at < max_age:
+        return stats
+    counters = _read_counters()
+    hits, misses = int(counters.get("hits", 0)), int(counters.get("misses", 0))
+    stats = {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "saved_seconds": round(counters.get("saved_ms", 0) / 1000, 1),
+    }
+    _stats = (time.monotonic(), stats)
+    return stats
+
+
+# --- EXTRACT ---
+def extract_land_record(model, raw_bytes, force=False, generate=None):
+    # Returns ({"name", "area"}, cached). force=True skips the cache lookup
+    # (but still refreshes the stored result); `generate` replaces
+    # model.generate_content, e.g. with a retrying wrapper.
+    key = cache_key(raw_bytes)
+    if not force:
+        cached = cache_get(key)
+        if cached is not None:
+            return cached, True
+
+    img, prep_stats = preprocess.prepare_image(raw_bytes)
+    return extract_prepared(model, key, img, prep_stats, generate), False
+
+
+def extract_prepared(model, key, img, prep_stats, generate=None):
+    # Model call for an image preprocess.prepare_image() already produced
+    # (bulk_ingest does that in another process). Logs the extraction stats
+    # and stores the result under `key` from cache_key(raw_bytes).
+    generate = generate or model.generate_content
+    start = time.perf_counter()
+    ok = False
+    try:
+        response = generate([EXTRACTION_PROMPT, img])
+        data = parse_response(response.text)
+        ok = True
+    finally:
+        latency_ms = (time.perf_counter() - start) * 1000
+        preprocess.log_extraction(prep_stats, latency_ms, ok)
+
+    cache_put(key, data, latency_ms)
+    return data
+
+
+if __name__ == "__main__":
+    # Operator view of the scan cache: python extraction.py
+    print(json.dumps(cache_stats(max_age=0), indent=2))
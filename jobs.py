@@ -0,0 +1,111 @@
+# --- ⚙️ BACKGROUND JOBS ---
+# Shared worker pool for Gemini calls. The pool size is the global cap on
+# concurrent model requests for this process; transient API errors are retried
+# with exponential backoff. Streamlit sessions submit a job and poll its
+# status instead of holding their script thread for the whole call.
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import extraction
+import metrics
+
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "4"))
+JOB_RETENTION_SECONDS = 600
+
+_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="gemini")
+_jobs = {}  # job_id -> (submitted_at, future)
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def transient_errors():
+    # google.api_core drags in grpc, so it is only imported once we call Gemini
+    try:
+        from google.api_core import exceptions as gexc
+    except ImportError:
+        return (ConnectionError, TimeoutError)
+    return (
+        gexc.ResourceExhausted,
+        gexc.TooManyRequests,
+        gexc.ServiceUnavailable,
+        gexc.InternalServerError,
+        gexc.DeadlineExceeded,
+        ConnectionError,
+        TimeoutError,
+    )
+
+
+def generate_with_retry(model, contents):
+    from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+    for attempt in Retrying(
+        retry=retry_if_exception_type(transient_errors()),
+        wait=wait_random_exponential(multiplier=1, max=20),
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        reraise=True,
+    ):
+        with attempt:
+            return model.generate_content(contents)
+
+
+def _purge_old(now):
+    for job_id, (submitted_at, fut) in list(_jobs.items()):
+        if fut.done() and now - submitted_at > JOB_RETENTION_SECONDS:
+            del _jobs[job_id]
+
+
+def submit(fn, *args, **kwargs):
+    job_id = uuid.uuid4().hex
+    fut = _pool.submit(fn, *args, **kwargs)
+    now = time.monotonic()
+    with _lock:
+        _purge_old(now)
+        _jobs[job_id] = (now, fut)
+    return job_id
+
+
+def _run_extraction(model, raw_bytes, force, lang, queued_at):
+    start = time.perf_counter()
+    metrics.observe("extraction_queue", (start - queued_at) * 1000, lang)
+    generate = lambda contents: generate_with_retry(model, contents)
+    try:
+        data, cached = extraction.extract_land_record(model, raw_bytes, force=force, generate=generate)
+    except Exception:
+        metrics.observe("extraction", (time.perf_counter() - start) * 1000, lang, error=True, size=len(raw_bytes))
+        raise
+    # cache hits are reported separately so they don't hide Gemini latency
+    stage = "extraction_cached" if cached else "extraction"
+    metrics.observe(stage, (time.perf_counter() - start) * 1000, lang, size=len(raw_bytes))
+    return data, cached
+
+
+def submit_extraction(model, raw_bytes, force=False, lang=None):
+    return submit(_run_extraction, model, raw_bytes, force, lang, time.perf_counter())
+
+
+def status(job_id):
+    with _lock:
+        entry = _jobs.get(job_id)
+    if entry is None:
+        return {"state": "missing"}
+    fut = entry[1]
+    if not fut.done():
+        return {"state": "running" if fut.running() else "queued"}
+    error = fut.exception()
+    if error is not None:
+        return {"state": "error", "error": error}
+    return {"state": "done", "result": fut.result()}
+
+
+def is_pending(job_id):
+    return status(job_id)["state"] in ("queued", "running")
+
+
+def forget(job_id):
+    with _lock:
+        _jobs.pop(job_id, None)
@@ -0,0 +1,374 @@
+# --- 🏋️ LOAD TEST ---
+# Drives N simulated farmers through steps 0-3 and the submit path against
+# local stand-ins for Gemini, gTTS and OpenWeather, using the same modules
+# app.py calls (tts_cache, weather, jobs/extraction, eligibility, pdf_render,
+# media, storage). Reports throughput, p50/p95/p99 per step and application
+# store write contention, and writes a JSON file to compare between releases:
+#
+#   python loadtest.py --sessions 50 -o bench_results/release.json
+#   python loadtest.py --sessions 50 --baseline bench_results/release.json
+#
+# Everything runs in a throwaway working directory (deleted afterwards), so
+# real caches and the real database are never touched. Browser-side waits (audio playback,
+# polling intervals) are not simulated - this measures server work only.
+import os
+import io
+import sys
+import json
+import time
+import random
+import hashlib
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STEPS = ["step0", "step1", "step2", "step3", "submit"]
+AMOUNT = "₹ 5,00,000"
+LANGS = ["mr", "hi", "en"]
+LANG_NAMES = {"mr": "Marathi", "hi": "Hindi", "en": "English"}
+
+_count_lock = threading.Lock()
+
+
+def _count(counter, key):
+    with _count_lock:
+        counter[key] += 1
+
+
+def _jitter(mean_ms):
+    return max(mean_ms, 0) * random.uniform(0.5, 1.5) / 1000
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return round(ordered[k], 1)
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": round(max(values), 1) if values else None,
+    }
+
+
+# --- FAKES ---
+def fake_mp3(text):
+    # Valid MPEG-2 Layer III frames (24 kHz, 32 kbps, 24 ms each), roughly
+    # as long as gTTS would speak the text, so mp3_duration() works
+    frame = bytes([0xFF, 0xF3, 0x44, 0xC4]) + b"\x00" * 92
+    return frame * max(10, len(text) * 3)
+
+
+def make_fake_tts(latency_ms, error_rate, counter):
+    def synthesize(text, lang):
+        _count(counter, "tts_calls")
+        time.sleep(_jitter(latency_ms))
+        if random.random() < error_rate:
+            raise ConnectionError("fake gTTS failure")
+        return fake_mp3(text)
+    return synthesize
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    # Stands in for genai.GenerativeModel
+    def __init__(self, latency_ms, error_rate, counter):
+        self.latency_ms, self.error_rate, self.counter = latency_ms, error_rate, counter
+
+    def generate_content(self, contents):
+        _count(self.counter, "gemini_calls")
+        time.sleep(_jitter(self.latency_ms))
+        if random.random() < self.error_rate:
+            from google.api_core import exceptions as gexc
+            raise gexc.ServiceUnavailable("fake Gemini overload")
+        n = random.randint(1, 99999)
+        area = round(random.uniform(0.2, 6.0), 2)
+        return FakeResponse('```json\n{"name": "Farmer %d", "area": "%s Hectare"}\n```' % (n, area))
+
+
+def start_weather_stub(latency_ms, error_rate, counter):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            _count(counter, "weather_calls")
+            time.sleep(_jitter(latency_ms))
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = json.dumps({"cod": 200, "main": {"temp": 31.5}, "weather": [{"description": "clear sky", "icon": "01d"}]})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def sample_scan(seed):
+    from PIL import Image, ImageDraw
+    img = Image.new("RGB", (1600, 1200), (245, 240, 225))
+    draw = ImageDraw.Draw(img)
+    rnd = random.Random(seed)
+    for y in range(60, 1150, 40):
+        draw.text((60, y), f"7/12 survey {seed}-{y} " + "x" * rnd.randint(10, 60), fill=(20, 20, 20))
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+# --- SIMULATED SESSION ---
+def run_session(session_id, mods, model, translations, results):
+    tts_cache, weather, jobs, eligibility, pdf_render, media, storage = mods
+    lang = LANGS[session_id % len(LANGS)]
+    t = translations[LANG_NAMES[lang]]
+    timings = {}
+    errors = []
+
+    def speak(text):
+        # speak_text: cached audio + duration + st.audio, which hashes the clip
+        # into Streamlit's media file manager; failures are shown, not fatal
+        try:
+            audio = tts_cache.get_audio(text, lang)
+            tts_cache.mp3_duration(audio)
+            hashlib.sha224(audio).hexdigest()
+        except Exception as e:
+            errors.append(("tts", repr(e)))
+
+    def sidebar():
+        weather.get_weather("Solapur")
+
+    def step(name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            errors.append((name, repr(e)))
+            raise
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
+
+    state = {}
+    scan = sample_scan(session_id)
+
+    def step0():
+        sidebar()
+        speak(t["greeting"])
+
+    def step1():
+        sidebar()
+        speak(t["step1_confirm"].format(amount=AMOUNT))
+
+    def step2():
+        sidebar()
+        speak(t["step2_intro"])
+        speak(t["step2_click_hint"])
+        speak(t["step2_analyzing"])
+        job_id = jobs.submit_extraction(model, scan, lang=lang)
+        while jobs.is_pending(job_id):
+            time.sleep(0.05)
+        job = jobs.status(job_id)
+        jobs.forget(job_id)
+        if job["state"] != "done":
+            raise RuntimeError(f"extraction {job['state']}: {job.get('error')}")
+        state["data"], _ = job["result"]
+        speak(t["step2_verify"].format(name=state["data"]["name"], area=state["data"]["area"]))
+
+    def step3():
+        sidebar()
+        profile = {"name": state["data"]["name"], "occupation": "Farmer", "land_holding": state["data"]["area"]}
+        schemes = eligibility.check_eligibility(profile)
+        state["scheme"] = schemes[0]["name"] if schemes else "General Application"
+        speak(t["step3_eligible"].format(area=state["data"]["area"]))
+        pdf = pdf_render.render_application(state["data"]["name"], state["data"]["area"], AMOUNT, state["scheme"])
+        media.media_url(pdf, "pdf", "application/pdf")
+        speak(t["step3_preview"])
+
+    def submit():
+        start = time.perf_counter()
+        storage.save_application(state["data"]["name"], state["data"]["area"], AMOUNT, state["scheme"])
+        results["save_ms"].append((time.perf_counter() - start) * 1000)
+        speak(t["success"])
+
+    completed = False
+    try:
+        for name, fn in zip(STEPS, [step0, step1, step2, step3, submit]):
+            step(name, fn)
+        completed = True
+    except Exception:
+        pass
+    with results["lock"]:
+        for name, ms in timings.items():
+            results["steps"][name].append(ms)
+        results["errors"].extend(errors)
+        results["completed"] += completed
+
+
+# --- DRIVER ---
+def run(args):
+    # Anything still written relative to the cwd (e.g. the legacy CSV) also
+    # lands in the scratch dir, which is removed afterwards
+    workdir = tempfile.mkdtemp(prefix="gram_sahayak_load_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return _drive(args, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _drive(args, workdir):
+    counter = {"tts_calls": 0, "gemini_calls": 0, "weather_calls": 0}
+    server = start_weather_stub(args.weather_latency_ms, args.weather_error_rate, counter)
+
+    # Point every store at the scratch dir before the modules read their settings
+    os.environ.update({
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts"),
+        "GRAM_SAHAYAK_DB": os.path.join(workdir, "gram_sahayak.db"),
+        "EXTRACTION_CACHE_DB": os.path.join(workdir, "extraction_cache.db"),
+        "PREPROCESS_STATS_FILE": os.path.join(workdir, "extraction_stats.jsonl"),
+        "METRICS_FILE": os.path.join(workdir, "metrics.jsonl"),
+        "OPENWEATHER_API_KEY": "loadtest",
+        "OPENWEATHER_URL": f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather",
+        "WEATHER_TTL_SECONDS": str(args.weather_ttl),
+        "GEMINI_MAX_CONCURRENCY": str(args.gemini_concurrency),
+    })
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import tts_cache, weather, jobs, eligibility, pdf_render, media, storage
+    media.MEDIA_DIR = os.path.join(workdir, "media")
+
+    tts_cache._synthesize = make_fake_tts(args.tts_latency_ms, args.tts_error_rate, counter)
+    model = FakeModel(args.gemini_latency_ms, args.gemini_error_rate, counter)
+    translations = load_translations()
+    storage.init_db()
+    if args.prewarm:
+        tts_cache.prewarm(translations)
+
+    results = {"lock": threading.Lock(), "steps": {s: [] for s in STEPS}, "errors": [], "save_ms": [], "completed": 0}
+    mods = (tts_cache, weather, jobs, eligibility, pdf_render, media, storage)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(args.sessions) as pool:
+            for i in range(args.sessions * args.rounds):
+                pool.submit(run_session, i, mods, model, translations, results)
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    error_counts = {}
+    for stage, _ in results["errors"]:
+        error_counts[stage] = error_counts.get(stage, 0) + 1
+    total = args.sessions * args.rounds
+    return {
+        "version": git_version(),
+        "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "tolerance")},
+        "elapsed_s": round(elapsed, 2),
+        "sessions_total": total,
+        "sessions_completed": results["completed"],
+        "throughput_sessions_per_s": round(results["completed"] / elapsed, 3) if elapsed else None,
+        "steps": {s: summarize(v) for s, v in results["steps"].items()},
+        "store_writes": dict(summarize(results["save_ms"]), writes_per_s=round(len(results["save_ms"]) / elapsed, 2)),
+        "errors": error_counts,
+        "upstream_calls": dict(counter),
+    }
+
+
+def load_translations():
+    # app.py is a Streamlit script, so pull the dict out without running it
+    import ast
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "translations" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise RuntimeError("translations not found in app.py")
+
+
+def git_version():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(result, baseline, tolerance):
+    # Returns a list of human-readable regressions
+    problems = []
+    for name, now in result["steps"].items():
+        before = baseline.get("steps", {}).get(name, {})
+        for q in ("p50_ms", "p95_ms"):
+            if before.get(q) and now.get(q) and now[q] > before[q] * (1 + tolerance) + 5:
+                problems.append(f"{name} {q}: {before[q]} ms -> {now[q]} ms")
+    before_w = baseline.get("store_writes", {}).get("p95_ms")
+    now_w = result["store_writes"].get("p95_ms")
+    if before_w and now_w and now_w > before_w * (1 + tolerance) + 5:
+        problems.append(f"store write p95: {before_w} ms -> {now_w} ms")
+    before_tp = baseline.get("throughput_sessions_per_s")
+    if before_tp and result["throughput_sessions_per_s"] < before_tp * (1 - tolerance):
+        problems.append(f"throughput: {before_tp} -> {result['throughput_sessions_per_s']} sessions/s")
+    if result["sessions_completed"] < baseline.get("sessions_completed", 0) * (1 - tolerance):
+        problems.append(f"completed sessions: {baseline['sessions_completed']} -> {result['sessions_completed']}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Gram Sahayak flow against local fakes.")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent simulated farmers")
+    parser.add_argument("--rounds", type=int, default=1, help="sessions per simulated farmer slot")
+    parser.add_argument("--gemini-latency-ms", type=float, default=1500)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.05)
+    parser.add_argument("--gemini-concurrency", type=int, default=4)
+    parser.add_argument("--tts-latency-ms", type=float, default=400)
+    parser.add_argument("--tts-error-rate", type=float, default=0.0)
+    parser.add_argument("--weather-latency-ms", type=float, default=300)
+    parser.add_argument("--weather-error-rate", type=float, default=0.0)
+    parser.add_argument("--weather-ttl", type=int, default=600)
+    parser.add_argument("--prewarm", action="store_true", help="pre-render static prompts first, like app startup")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, e.g. 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for p in problems:
+            print(f"❌ {p}")
+        if problems:
+            sys.exit(1)
+        print("✅ No load-test regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# --- 📦 MEDIA FILES ---
+# Generated PDFs are written once under static/media/<sha256>.<ext>
+# and referenced by URL instead of being inlined as base64 on every render.
+# Streamlit's static file server (server.enableStaticServing) is a tornado
+# StaticFileHandler, so the `?v=` query below makes it send a long-lived
+# Cache-Control header; ETag/Last-Modified give 304s on revalidation. Because
+# names are content hashes a URL never changes meaning, so browsers can keep
+# what they already downloaded. The folder is trimmed oldest-first by size.
+# Audio is not published here: this server labels .mp3 as text/plain with
+# X-Content-Type-Options: nosniff, so app.py hands clips to st.audio, whose
+# /media/<hash>.mp3 endpoint sends audio/mpeg. MEDIA_INLINE=1 forces data:
+# URIs (data_uri) for both PDFs and audio.
+import os
+import base64
+import hashlib
+import threading
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+MEDIA_DIR = os.path.join(STATIC_DIR, "media")
+URL_PREFIX = "app/static/media"
+MAX_BYTES = int(os.getenv("MEDIA_CACHE_MB", "200")) * 1024 * 1024
+FORCE_INLINE = os.getenv("MEDIA_INLINE", "0") == "1"
+
+_lock = threading.Lock()
+_known = set()  # files this process has already written or seen
+
+
+def data_uri(data, mime):
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+def _trim():
+    files, total = [], 0
+    for name in os.listdir(MEDIA_DIR):
+        path = os.path.join(MEDIA_DIR, name)
+        try:
+            st_ = os.stat(path)
+        except OSError:
+            continue
+        files.append((st_.st_mtime, st_.st_size, name))
+        total += st_.st_size
+    for _, size, name in sorted(files):
+        if total <= MAX_BYTES:
+            break
+        try:
+            os.remove(os.path.join(MEDIA_DIR, name))
+        except OSError:
+            continue
+        _known.discard(name)
+        total -= size
+
+
+def publish(data, ext):
+    # Returns the URL of the stored file (writing it if needed)
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{digest}.{ext}"
+    path = os.path.join(MEDIA_DIR, name)
+    with _lock:
+        if name in _known and os.path.exists(path):
+            os.utime(path)  # keep recently used files through trimming
+        else:
+            os.makedirs(MEDIA_DIR, exist_ok=True)
+            if not os.path.exists(path):
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                _trim()
+            _known.add(name)
+    return f"{URL_PREFIX}/{name}?v={digest[:16]}"
+
+
+def media_url(data, ext, mime, static_enabled=True):
+    # Static URL when the server can serve it, data: URI otherwise
+    if static_enabled and not FORCE_INLINE:
+        try:
+            return publish(data, ext)
+        except OSError:
+            pass
+    return data_uri(data, mime)
@@ -0,0 +1,164 @@
+# --- 📈 METRICS ---
+# Cheap in-process timing for each stage of the application flow (gTTS,
+# Gemini extraction, PDF, weather, eligibility, saves, step transitions).
+# Every observation lands in a fixed-bucket latency histogram keyed by
+# (stage, lang) together with error counts and payload sizes. A background
+# thread writes one JSON line per key every METRICS_FLUSH_SECONDS to a
+# rotating file and resets the interval counters.
+#
+#   with metrics.timed("tts", lang) as m:
+#       audio = tts_cache.get_audio(text, lang)
+#       m.size(len(audio))
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from logging.handlers import RotatingFileHandler
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join("metrics", "metrics.jsonl"))
+FLUSH_SECONDS = int(os.getenv("METRICS_FLUSH_SECONDS", "60"))
+MAX_FILE_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# upper bounds in ms; the last bucket catches everything slower
+BUCKETS_MS = [0.1, 0.5, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+_stats = {}  # (stage, lang) -> dict
+_lock = threading.Lock()
+_flusher = None
+_logger = None
+
+
+def _new_entry():
+    return {"count": 0, "errors": 0, "sum_ms": 0.0, "max_ms": 0.0,
+            "buckets": [0] * (len(BUCKETS_MS) + 1), "bytes": 0, "sized": 0}
+
+
+def observe(stage, ms, lang=None, error=False, size=None):
+    if not ENABLED:
+        return
+    key = (stage, lang)
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = _new_entry()
+        entry["count"] += 1
+        entry["sum_ms"] += ms
+        if ms > entry["max_ms"]:
+            entry["max_ms"] = ms
+        entry["buckets"][bisect_left(BUCKETS_MS, ms)] += 1
+        if error:
+            entry["errors"] += 1
+        if size is not None:
+            entry["bytes"] += size
+            entry["sized"] += 1
+    _ensure_flusher()
+
+
+class _Timer:
+    __slots__ = ("stage", "lang", "start", "failed", "payload")
+
+    def __init__(self, stage, lang):
+        self.stage, self.lang = stage, lang
+        self.failed, self.payload = False, None
+
+    def size(self, n):
+        self.payload = n
+
+    def error(self):
+        # for failures that are handled without raising
+        self.failed = True
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.start) * 1000
+        observe(self.stage, ms, self.lang, error=self.failed or exc_type is not None, size=self.payload)
+        return False
+
+
+def timed(stage, lang=None):
+    return _Timer(stage, lang)
+
+
+def _percentile(buckets, count, q):
+    # upper bound of the bucket holding the q-th observation
+    target, seen = q * count, 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if seen >= target:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else None
+    return None
+
+
+def snapshot(reset=False):
+    with _lock:
+        items = list(_stats.items())
+        if reset:
+            _stats.clear()
+    rows = []
+    for (stage, lang), e in items:
+        rows.append({
+            "stage": stage,
+            "lang": lang,
+            "count": e["count"],
+            "errors": e["errors"],
+            "mean_ms": round(e["sum_ms"] / e["count"], 1) if e["count"] else 0,
+            "max_ms": round(e["max_ms"], 1),
+            "p50_ms": _percentile(e["buckets"], e["count"], 0.50),
+            "p95_ms": _percentile(e["buckets"], e["count"], 0.95),
+            "p99_ms": _percentile(e["buckets"], e["count"], 0.99),
+            "buckets_ms": dict(zip([str(b) for b in BUCKETS_MS] + ["inf"], e["buckets"])),
+            "mean_bytes": round(e["bytes"] / e["sized"]) if e["sized"] else None,
+        })
+    return rows
+
+
+# --- EXPORT ---
+def _get_logger():
+    global _logger
+    if _logger is None:
+        os.makedirs(os.path.dirname(METRICS_FILE) or ".", exist_ok=True)
+        handler = RotatingFileHandler(METRICS_FILE, maxBytes=MAX_FILE_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("gram_sahayak.metrics")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+def flush():
+    rows = snapshot(reset=True)
+    if not rows:
+        return 0
+    ts = time.strftime('%Y-%m-%d %H:%M:%S')
+    logger = _get_logger()
+    for row in rows:
+        logger.info(json.dumps(dict(row, ts=ts, interval_s=FLUSH_SECONDS), ensure_ascii=False))
+    return len(rows)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        try:
+            flush()
+        except Exception:
+            pass  # metrics must never take the app down
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+            _flusher.start()
@@ -0,0 +1,124 @@
+# --- 📄 PDF RENDERING ---
+# The fixed part of the application form (rule + field labels) is drawn once
+# per document as a reusable form XObject; each page only adds the variable
+# text on top. Finished single-application PDFs are memoized, and
+# render_batch() puts many applications into one printable file:
+#
+#   python pdf_render.py "2025-01-01" "2025-01-31 23:59:59" -o batch.pdf
+import io
+import os
+import time
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+CACHE_ITEMS = int(os.getenv("PDF_CACHE_ITEMS", "256"))
+TEMPLATE_NAME = "application_template"
+LABEL_FONT = ("Helvetica", 12)
+
+# key, label, y position
+FIELDS = [
+    ("date", "Date: ", 700),
+    ("name", "Name: ", 660),
+    ("area", "Land Area: ", 640),
+    ("amount", "Loan Amount: ", 600),
+]
+
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _value_offsets():
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    # x position where each value starts, right after its label
+    return {key: 50 + stringWidth(label, *LABEL_FONT) for key, label, _ in FIELDS}
+
+
+def _define_template(c):
+    c.beginForm(TEMPLATE_NAME)
+    c.line(50, 735, 550, 735)
+    c.setFont(*LABEL_FONT)
+    for _, label, y in FIELDS:
+        c.drawString(50, y, label)
+    c.endForm()
+
+
+def _draw_page(c, name, area, amount, scheme_name, date):
+    c.doForm(TEMPLATE_NAME)
+    c.setFont("Helvetica-Bold", 20)
+    c.drawString(50, 750, f"APPLICATION: {scheme_name}")
+    c.setFont(*LABEL_FONT)
+    offsets = _value_offsets()
+    values = {"date": date, "name": name, "area": area, "amount": amount}
+    for key, _, y in FIELDS:
+        c.drawString(offsets[key], y, str(values[key]))
+
+
+def _render(records, title):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.setTitle(title)
+    _define_template(c)
+    for rec in records:
+        _draw_page(c, *rec)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def render_application(name, area, amount, scheme_name):
+    date = time.strftime('%d-%m-%Y')
+    key = (name, area, amount, scheme_name, date)
+    with _lock:
+        pdf = _memo.get(key)
+        if pdf is not None:
+            _memo.move_to_end(key)
+            return pdf
+
+    pdf = _render([key], f"{scheme_name} Application")
+    with _lock:
+        _memo[key] = pdf
+        while len(_memo) > CACHE_ITEMS:
+            _memo.popitem(last=False)
+    return pdf
+
+
+def render_batch(applications, title="Applications"):
+    # applications: iterable of dicts with name, area, amount, scheme and an
+    # optional date (defaults to today)
+    today = time.strftime('%d-%m-%Y')
+    records = [
+        (a["name"], a["area"], a["amount"], a["scheme"], a.get("date") or today)
+        for a in applications
+    ]
+    return _render(records, title)
+
+
+if __name__ == "__main__":
+    import argparse
+    import storage
+
+    parser = argparse.ArgumentParser(description="Render stored applications into one printable PDF.")
+    parser.add_argument("start", help="timestamp, e.g. 2025-01-01")
+    parser.add_argument("end", help="timestamp, e.g. '2025-01-31 23:59:59'")
+    parser.add_argument("-o", "--output", default="applications.pdf")
+    args = parser.parse_args()
+
+    rows = storage.find_between(args.start, args.end, limit=100000)
+    apps = [
+        {
+            "name": r["farmer_name"],
+            "area": r["land_area"],
+            "amount": r["loan_amount"],
+            "scheme": r["scheme"],
+            "date": time.strftime('%d-%m-%Y', time.strptime(r["timestamp"], '%Y-%m-%d %H:%M:%S')) if r["timestamp"] else None,
+        }
+        for r in rows
+    ]
+    with open(args.output, "wb") as f:
+        f.write(render_batch(apps))
+    print(f"Wrote {len(apps)} applications to {args.output}")
@@ -0,0 +1,148 @@
+# --- 🖼️ IMAGE PREPROCESSING ---
+# Shrinks 7/12 photos before they are sent to Gemini: fix EXIF rotation,
+# downscale to a target long edge, optional grayscale/contrast, and re-encode
+# to fit a byte budget. Every extraction is logged so the settings can be
+# tuned against accuracy (run `python preprocess.py` for a summary).
+import os
+import io
+import json
+import time
+import statistics
+
+STATS_FILE = os.getenv("PREPROCESS_STATS_FILE", "extraction_stats.jsonl")
+
+DEFAULT_CONFIG = {
+    "enabled": os.getenv("PREPROCESS_ENABLED", "1") != "0",
+    "long_edge": int(os.getenv("PREPROCESS_LONG_EDGE", "1600")),
+    "mode": os.getenv("PREPROCESS_MODE", "none"),  # none | grayscale | autocontrast
+    "format": os.getenv("PREPROCESS_FORMAT", "JPEG"),  # JPEG | WEBP
+    "max_kb": int(os.getenv("PREPROCESS_MAX_KB", "300")),
+    "min_quality": 40,
+}
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+def _encode(img, fmt, quality):
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _flatten(img):
+    # Transparent PNGs would turn black when converted to RGB/L; paper is white
+    from PIL import Image
+
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img
+
+
+def prepare_image(raw_bytes, config=None):
+    from PIL import Image, ImageOps
+
+    cfg = dict(DEFAULT_CONFIG, **(config or {}))
+    cfg["format"] = str(cfg["format"]).upper()
+    start = time.perf_counter()
+
+    img = Image.open(io.BytesIO(raw_bytes))
+    original_size = img.size
+    original_format = (img.format or "JPEG").upper()
+
+    if not cfg["enabled"]:
+        stats = {
+            "enabled": False,
+            "original_bytes": len(raw_bytes),
+            "output_bytes": len(raw_bytes),
+            "saved_bytes": 0,
+            "original_size": original_size,
+            "output_size": original_size,
+            "preprocess_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        return {"mime_type": MIME_TYPES.get(original_format, "image/jpeg"), "data": raw_bytes}, stats
+
+    if original_format == "JPEG":
+        img.draft("RGB", (cfg["long_edge"], cfg["long_edge"]))  # let libjpeg decode at reduced scale
+    rotated = img.getexif().get(0x0112, 1) != 1  # EXIF Orientation
+    img = ImageOps.exif_transpose(img)
+    if max(img.size) > cfg["long_edge"]:
+        img.thumbnail((cfg["long_edge"], cfg["long_edge"]), Image.LANCZOS)
+
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    # Any of these changes the pixels, so the raw upload is no substitute
+    transformed = rotated or has_alpha or img.size != original_size or cfg["mode"] != "none"
+    img = _flatten(img)
+    if cfg["mode"] == "grayscale":
+        img = img.convert("L")
+    elif cfg["mode"] == "autocontrast":
+        img = ImageOps.autocontrast(img.convert("L"), cutoff=1)
+    elif img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    # Step quality down until the file fits the budget (or we hit the floor)
+    fmt = cfg["format"] if cfg["format"] in MIME_TYPES else "JPEG"
+    budget = cfg["max_kb"] * 1024
+    quality = 90
+    data = _encode(img, fmt, quality)
+    while len(data) > budget and quality > cfg["min_quality"]:
+        quality -= 10
+        data = _encode(img, fmt, quality)
+
+    # Re-encoding a small scan at full size can make it bigger; send it as is
+    keep_original = not transformed and len(data) >= len(raw_bytes) and original_format in MIME_TYPES
+    if keep_original:
+        data, fmt = raw_bytes, original_format
+
+    stats = {
+        "enabled": True,
+        "original_bytes": len(raw_bytes),
+        "output_bytes": len(data),
+        "saved_bytes": len(raw_bytes) - len(data),
+        "original_size": original_size,
+        "output_size": original_size if keep_original else img.size,
+        "quality": None if keep_original else quality,
+        "format": fmt,
+        "kept_original": keep_original,
+        "mode": cfg["mode"],
+        "preprocess_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    return {"mime_type": MIME_TYPES[fmt], "data": data}, stats
+
+
+def log_extraction(stats, latency_ms, ok):
+    record = dict(stats, extraction_ms=round(latency_ms, 1), ok=ok, ts=time.strftime('%Y-%m-%d %H:%M:%S'))
+    try:
+        with open(STATS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+def summarize(path=STATS_FILE):
+    groups = {True: [], False: []}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            groups[bool(rec.get("enabled"))].append(rec)
+    summary = {}
+    for enabled, recs in groups.items():
+        if not recs:
+            continue
+        summary["preprocessed" if enabled else "original"] = {
+            "runs": len(recs),
+            "success_rate": round(sum(1 for r in recs if r.get("ok")) / len(recs), 3),
+            "median_upload_kb": round(statistics.median(r["output_bytes"] for r in recs) / 1024, 1),
+            "median_saved_kb": round(statistics.median(r["saved_bytes"] for r in recs) / 1024, 1),
+            "median_extraction_ms": round(statistics.median(r["extraction_ms"] for r in recs), 1),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    print(json.dumps(summarize(), indent=2))
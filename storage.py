@@ -0,0 +1,196 @@
+# --- 📊 APPLICATION STORE ---
+# SQLite (WAL) store for submitted applications. All writes go through one
+# writer thread that groups whatever is queued into a single transaction, so
+# concurrent Streamlit sessions never interleave rows and callers only return
+# once their row is on disk. Bulk-ingest results live in their own table,
+# keyed by scan hash, so re-running a folder updates rows instead of adding them.
+import os
+import csv
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+DB_FILE = os.getenv("GRAM_SAHAYAK_DB", "gram_sahayak.db")
+LEGACY_CSV = "gram_sahayak_db.csv"
+MAX_BATCH = 256
+
+INSERT_APPLICATION = "INSERT INTO applications (timestamp, farmer_name, land_area, scheme, loan_amount) VALUES (?, ?, ?, ?, ?)"
+UPSERT_INGEST = """
+INSERT INTO ingest_results (scan_hash, file, farmer_name, land_area, schemes, ingested_at) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (scan_hash) DO UPDATE SET
+    file = excluded.file, farmer_name = excluded.farmer_name, land_area = excluded.land_area,
+    schemes = excluded.schemes, ingested_at = excluded.ingested_at
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    farmer_name TEXT NOT NULL,
+    land_area TEXT,
+    scheme TEXT,
+    loan_amount TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_applications_name ON applications (farmer_name);
+CREATE INDEX IF NOT EXISTS idx_applications_timestamp ON applications (timestamp);
+CREATE TABLE IF NOT EXISTS ingest_results (
+    scan_hash TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    farmer_name TEXT,
+    land_area TEXT,
+    schemes TEXT,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TEXT NOT NULL
+);
+"""
+
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or DB_FILE, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+def init_db(path=None):
+    conn = connect(path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# --- WRITER THREAD ---
+def _writer_loop():
+    conn = connect()
+    conn.executescript(SCHEMA)
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < MAX_BATCH:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with conn:  # one transaction / one fsync for the whole batch
+                for sql, row, _ in batch:
+                    conn.execute(sql, row)
+        except Exception:
+            # One bad row must not fail everyone else queued with it: redo
+            # the batch row by row so only that caller gets the error
+            for sql, row, fut in batch:
+                try:
+                    with conn:
+                        conn.execute(sql, row)
+                except Exception as e:
+                    fut.set_exception(e)
+                else:
+                    fut.set_result(True)
+        else:
+            for _, _, fut in batch:
+                fut.set_result(True)
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="gram-sahayak-db-writer", daemon=True)
+            _writer.start()
+
+
+def _submit(sql, row):
+    _ensure_writer()
+    fut = Future()
+    _queue.put((sql, row, fut))
+    return fut
+
+
+def submit_application(name, area, amount, scheme, timestamp=None):
+    row = (timestamp or time.strftime('%Y-%m-%d %H:%M:%S'), name or "", area, scheme, amount)
+    return _submit(INSERT_APPLICATION, row)
+
+
+def save_application(name, area, amount, scheme, timeout=30):
+    return submit_application(name, area, amount, scheme).result(timeout=timeout)
+
+
+def save_ingest_result(scan_hash, file, name, area, schemes, timeout=30):
+    row = (scan_hash, file, name, area, schemes, time.strftime('%Y-%m-%d %H:%M:%S'))
+    return _submit(UPSERT_INGEST, row).result(timeout=timeout)
+
+
+# --- LOOKUPS ---
+def find_by_name(name, limit=100):
+    conn = connect()
+    try:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT * FROM applications WHERE farmer_name = ? ORDER BY timestamp DESC LIMIT ?", (name, limit)
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def find_between(start, end, limit=1000):
+    conn = connect()
+    try:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT * FROM applications WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp LIMIT ?", (start, end, limit)
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+# --- ONE-SHOT CSV MIGRATION ---
+def migrate_csv(csv_path=LEGACY_CSV):
+    if not os.path.exists(csv_path):
+        return 0
+    init_db()
+    conn = connect()
+    conn.isolation_level = None
+    try:
+        # IMMEDIATE takes the write lock up front so two processes starting
+        # together cannot both import the same file
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute("SELECT 1 FROM migrations WHERE name = ?", (f"csv:{csv_path}",)).fetchone()
+            if done:
+                conn.execute("ROLLBACK")
+                return 0
+            with open(csv_path, newline='', encoding='utf-8') as f:
+                rows = [
+                    (r.get("Timestamp"), r.get("Farmer Name") or "", r.get("Land Area"), r.get("Scheme"), r.get("Loan Amount"))
+                    for r in csv.DictReader(f)
+                ]
+            conn.executemany(INSERT_APPLICATION, rows)
+            conn.execute(
+                "INSERT INTO migrations (name, applied_at) VALUES (?, ?)",
+                (f"csv:{csv_path}", time.strftime('%Y-%m-%d %H:%M:%S')),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else LEGACY_CSV
+    print(f"Imported {migrate_csv(path)} rows from {path} into {DB_FILE}")
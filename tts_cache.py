@@ -0,0 +1,205 @@
+# --- 🔊 TTS CACHE ---
+# Two-tier cache for gTTS audio keyed by (text, lang):
+#   1. in-process LRU (shared by every Streamlit session in this process)
+#   2. content-addressed MP3 files on disk, evicted oldest-first by total size
+# Concurrent misses for the same key share one gTTS call.
+import os
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+MEMORY_ITEMS = int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "128"))
+DISK_MAX_BYTES = int(os.getenv("TTS_CACHE_DISK_MB", "200")) * 1024 * 1024
+
+VOICE_LANGS = {"Marathi": "mr", "Hindi": "hi", "English": "en"}
+
+# Prompts that never change per farmer - safe to render ahead of time
+STATIC_KEYS = ["greeting", "step2_intro", "step2_click_hint", "step2_analyzing", "step3_preview", "success"]
+
+_memory = OrderedDict()
+_inflight = {}  # key -> Future for a synthesis already under way
+_disk_bytes = None  # running size of CACHE_DIR, seeded by the first scan
+_lock = threading.Lock()
+
+
+def cache_key(text, lang):
+    return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _disk_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.mp3")
+
+
+def _remember(key, audio):
+    with _lock:
+        _memory[key] = audio
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ITEMS:
+            _memory.popitem(last=False)
+
+
+def _read_disk(key):
+    path = _disk_path(key)
+    try:
+        with open(path, "rb") as f:
+            audio = f.read()
+        os.utime(path)  # mark as recently used for eviction
+        return audio
+    except OSError:
+        return None
+
+
+def _write_disk(key, audio):
+    global _disk_bytes
+    path = _disk_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(audio)
+    os.replace(tmp, path)  # atomic, so readers never see half a file
+    # Only walk the tree when the running total says we are over budget;
+    # the walk also corrects drift from other processes sharing the folder
+    with _lock:
+        if _disk_bytes is not None:
+            _disk_bytes += len(audio)
+        needs_scan = _disk_bytes is None or _disk_bytes > DISK_MAX_BYTES
+    if needs_scan:
+        _evict_disk()
+
+
+def _evict_disk():
+    global _disk_bytes
+    files = []
+    total = 0
+    for root, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            if not name.endswith(".mp3"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st_ = os.stat(path)
+            except OSError:
+                continue
+            files.append((st_.st_mtime, st_.st_size, path))
+            total += st_.st_size
+    if total > DISK_MAX_BYTES:
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= DISK_MAX_BYTES:
+                break
+    with _lock:
+        _disk_bytes = total
+
+
+def _synthesize(text, lang):
+    from gtts import gTTS  # imported on first miss, not at app start
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+# --- MP3 DURATION ---
+# Walks the MPEG frame headers (gTTS returns MPEG-2 Layer III) so callers can
+# wait exactly as long as the clip plays.
+_BITRATES = {
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def mp3_duration(data):
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size
+
+    seconds = 0.0
+    end = len(data) - 4
+    while pos <= end:
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+            pos += 1  # not a frame header, resync
+            continue
+        version = (b1 >> 3) & 0x03   # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+        layer = 4 - ((b1 >> 1) & 0x03)  # 3 = Layer III, 2 = Layer II
+        bitrate_idx, rate_idx = b2 >> 4, (b2 >> 2) & 0x03
+        if version == 1 or layer not in (2, 3) or bitrate_idx in (0, 15) or rate_idx == 3:
+            pos += 1
+            continue
+        table = _BITRATES[(1 if version == 3 else 2, layer)]
+        bitrate = table[bitrate_idx] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_idx]
+        samples = 1152 if version == 3 or layer == 2 else 576
+        padding = (b2 >> 1) & 0x01
+        frame_len = samples // 8 * bitrate // sample_rate + padding
+        seconds += samples / sample_rate
+        pos += max(frame_len, 1)
+    return seconds
+
+
+def _load(key, text, lang):
+    audio = _read_disk(key)
+    if audio is None:
+        audio = _synthesize(text, lang)
+        try:
+            _write_disk(key, audio)
+        except OSError:
+            pass  # a read-only disk should not break speech
+    _remember(key, audio)
+    return audio
+
+
+def get_audio(text, lang="mr"):
+    key = cache_key(text, lang)
+    with _lock:
+        audio = _memory.get(key)
+        if audio is not None:
+            _memory.move_to_end(key)
+            return audio
+        fut = _inflight.get(key)
+        owner = fut is None
+        if owner:
+            fut = _inflight[key] = Future()
+    if not owner:
+        return fut.result()  # another session is already fetching this clip
+
+    try:
+        audio = _load(key, text, lang)
+    except Exception as e:
+        fut.set_exception(e)
+        raise
+    else:
+        fut.set_result(audio)
+        return audio
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def prewarm(translations, keys=STATIC_KEYS):
+    # Render every static prompt in every language; failures are skipped so a
+    # flaky connection at startup only costs us a later cache miss.
+    done, failed = 0, 0
+    for language, strings in translations.items():
+        lang = VOICE_LANGS.get(language)
+        if not lang:
+            continue
+        for k in keys:
+            if k not in strings:
+                continue
+            try:
+                get_audio(strings[k], lang)
+                done += 1
+            except Exception:
+                failed += 1
+    return done, failed
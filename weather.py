@@ -0,0 +1,77 @@
+# --- 🌦️ WEATHER SERVICE ---
+# Process-wide, per-city weather cache. Page renders only ever read the cache;
+# expired entries are refreshed on a background thread (stale-while-revalidate)
+# so every session together makes at most one upstream call per city per TTL.
+import os
+import time
+import threading
+
+import metrics
+
+API_URL = os.getenv("OPENWEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+TTL_SECONDS = int(os.getenv("WEATHER_TTL_SECONDS", "600"))
+TIMEOUT = (3, 5)  # connect, read
+RETRY_AFTER_ERROR = 60
+EMPTY = (None, None, None)
+
+_session = None
+_cache = {}  # city -> (fetched_at, (temp, desc, icon))
+_refreshing = set()
+_retry_at = {}  # city -> monotonic time before which a failed city is not retried
+_lock = threading.Lock()
+
+
+def _get_session():
+    # Built on the first refresh, which already runs off the render path
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _session = session
+    return _session
+
+
+def fetch_weather(city, api_key):
+    try:
+        resp = _get_session().get(API_URL, params={"q": city, "appid": api_key, "units": "metric"}, timeout=TIMEOUT)
+        data = resp.json()
+        if data.get("cod") == 200:
+            return data['main']['temp'], data['weather'][0]['description'], data['weather'][0]['icon']
+    except Exception:
+        pass
+    return None
+
+
+def _refresh(city, api_key):
+    try:
+        with metrics.timed("weather_fetch") as m:
+            result = fetch_weather(city, api_key)
+            if result is None: m.error()
+        with _lock:
+            if result is not None:
+                _cache[city] = (time.monotonic(), result)
+                _retry_at.pop(city, None)
+            else:
+                _retry_at[city] = time.monotonic() + RETRY_AFTER_ERROR
+    finally:
+        with _lock:
+            _refreshing.discard(city)
+
+
+def get_weather(city="Solapur"):
+    api_key = os.getenv("OPENWEATHER_API_KEY")
+    if not api_key: return EMPTY
+
+    with _lock:
+        now = time.monotonic()
+        entry = _cache.get(city)
+        fresh = entry is not None and now - entry[0] < TTL_SECONDS
+        backing_off = now < _retry_at.get(city, 0)
+        if not fresh and not backing_off and city not in _refreshing:
+            _refreshing.add(city)
+            threading.Thread(target=_refresh, args=(city, api_key), daemon=True).start()
+    # Stale data beats a blank sidebar; nothing at all on the very first call
+    return entry[1] if entry else EMPTY